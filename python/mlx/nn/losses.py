@@ -1,5 +1,16 @@
 # Copyright © 2023 Apple Inc.
 
+"""Loss functions.
+
+The hot paths in this module are bound to :func:`mx.compile` graphs that are
+traced once and reused, so repeated calls on identically-shaped inputs do not
+rebuild graphs. MLX arrays are immutable, so there is no ``out=`` argument to
+reuse an accumulator across training steps; to get buffer reuse, compile the
+enclosing step (forward, loss and update) with :func:`mx.compile` — the
+allocator then recycles the intermediate and output buffers between
+iterations.
+"""
+
 import math
 from typing import Literal, Optional, get_args
 
@@ -8,16 +19,234 @@ import mlx.core as mx
 Reduction = Literal["none", "mean", "sum"]
 
 
+def _gather_target_scores(scores: mx.array, targets: mx.array, axis: int) -> mx.array:
+    """Gather the per-example score of each target class.
+
+    Folds the unsqueeze/squeeze pair that :func:`mx.take_along_axis`
+    requires into one helper; under :func:`mx.compile` the two reshapes are
+    metadata-only and get elided from the graph.
+
+    For the common case of 2-D scores with the class axis last, a direct
+    integer-array index skips the general axis handling of
+    ``take_along_axis``. Shapes are static when traced, so the branch is
+    resolved at trace time.
+    """
+    if scores.ndim == 2 and targets.ndim == 1 and axis in (-1, 1):
+        return scores[mx.arange(scores.shape[0]), targets]
+    return mx.take_along_axis(scores, targets[..., None], axis).squeeze(-1)
+
+
+_gather_target_scores_compiled = mx.compile(_gather_target_scores)
+
+
+def _resolve_dtype(name: str) -> mx.Dtype:
+    # mx.Dtype is not a valid compile-time constant, so the compiled paths
+    # receive the dtype by name and resolve it while tracing.
+    return getattr(mx, name)
+
+
+def _dtype_name(dtype: Optional[mx.Dtype]) -> Optional[str]:
+    # str(mx.bfloat16) == "mlx.core.bfloat16"
+    return None if dtype is None else str(dtype).rsplit(".", 1)[-1]
+
+
+def _cross_entropy_sparse_grad(
+    logits: mx.array,
+    targets: mx.array,
+    axis: int,
+    label_smoothing: float,
+    cotangent: mx.array,
+) -> mx.array:
+    """Closed-form cross entropy gradient for class-index targets.
+
+    The gradient with respect to the logits is ``softmax(logits)`` minus
+    the (smoothed) target distribution, so the backward pass never needs
+    to replay the forward reductions.
+    """
+    num_classes = logits.shape[axis]
+    shape = [1] * logits.ndim
+    shape[axis] = num_classes
+    classes = mx.arange(num_classes).reshape(shape)
+    y = (mx.expand_dims(targets, axis) == classes).astype(logits.dtype)
+    if label_smoothing > 0:
+        y = (1 - label_smoothing) * y + label_smoothing / num_classes
+    return (mx.softmax(logits, axis=axis) - y) * mx.expand_dims(cotangent, axis)
+
+
+@mx.custom_function
+def _cross_entropy_sparse(
+    logits: mx.array, targets: mx.array, axis: int, compute_dtype: Optional[str]
+) -> mx.array:
+    """Cross entropy for class-index targets in a single streaming pass.
+
+    The max, the exponential sum and the target score are all computed from
+    one traversal of ``logits`` so that, under :func:`mx.compile`, the whole
+    expression fuses into a single kernel.
+
+    Both the score and the log-sum-exp are computed on the max-shifted
+    logits. The shift cancels between the two terms, and subtracting the
+    pre-shifted O(1) values avoids the catastrophic cancellation of
+    ``logsumexp(logits) - score`` when one logit dominates.
+
+    When ``compute_dtype`` names a narrower float type the reductions run
+    in that type — safe after the max shift — and the result is cast back
+    to the input precision.
+    """
+    out_dtype = logits.dtype
+    if compute_dtype is not None:
+        logits = logits.astype(_resolve_dtype(compute_dtype))
+    m = mx.max(logits, axis=axis, keepdims=True)
+    shifted = logits - m
+    logsumexp_shifted = mx.logsumexp(shifted, axis=axis)
+    score = _gather_target_scores(shifted, targets, axis)
+    loss = logsumexp_shifted - score
+    return loss if compute_dtype is None else loss.astype(out_dtype)
+
+
+@_cross_entropy_sparse.vjp
+def _cross_entropy_sparse_vjp(primals, cotangents, outputs):
+    logits, targets, axis, compute_dtype = primals
+    if compute_dtype is not None:
+        logits = logits.astype(_resolve_dtype(compute_dtype))
+    return (_cross_entropy_sparse_grad(logits, targets, axis, 0.0, cotangents),)
+
+
+@mx.custom_function
+def _cross_entropy_sparse_smoothed(
+    logits: mx.array,
+    targets: mx.array,
+    axis: int,
+    label_smoothing: float,
+    compute_dtype: Optional[str],
+) -> mx.array:
+    """Label-smoothed variant of :func:`_cross_entropy_sparse`.
+
+    The true class score is mixed with the mean of the shifted logits; the
+    max offset cancels since the mixing weights sum to one. The smoothing
+    factor is a Python float so it is folded as a constant when traced.
+    """
+    out_dtype = logits.dtype
+    if compute_dtype is not None:
+        logits = logits.astype(_resolve_dtype(compute_dtype))
+    m = mx.max(logits, axis=axis, keepdims=True)
+    shifted = logits - m
+    logsumexp_shifted = mx.log(mx.sum(mx.exp(shifted), axis=axis))
+    score = _gather_target_scores(shifted, targets, axis)
+    score = (1 - label_smoothing) * score + label_smoothing * shifted.mean(axis=axis)
+    loss = logsumexp_shifted - score
+    return loss if compute_dtype is None else loss.astype(out_dtype)
+
+
+@_cross_entropy_sparse_smoothed.vjp
+def _cross_entropy_sparse_smoothed_vjp(primals, cotangents, outputs):
+    logits, targets, axis, label_smoothing, compute_dtype = primals
+    if compute_dtype is not None:
+        logits = logits.astype(_resolve_dtype(compute_dtype))
+    return (
+        _cross_entropy_sparse_grad(logits, targets, axis, label_smoothing, cotangents),
+    )
+
+
+def _cross_entropy_dense(logits: mx.array, targets: mx.array, axis: int) -> mx.array:
+    """Cross entropy for probability (or one-hot) targets.
+
+    Relies on the fused :func:`mx.logsumexp` primitive for the stable
+    reduction; compiling the surrounding expression fuses the score
+    contraction with it.
+    """
+    score = mx.sum(logits * targets, axis=axis)
+    return mx.logsumexp(logits, axis=axis) - score
+
+
+def _cross_entropy_dense_smoothed(
+    logits: mx.array, targets: mx.array, axis: int, label_smoothing: float
+) -> mx.array:
+    """Label-smoothed variant of :func:`_cross_entropy_dense`."""
+    score = mx.sum(logits * targets, axis=axis)
+    score = (1 - label_smoothing) * score + label_smoothing * logits.mean(axis=axis)
+    return mx.logsumexp(logits, axis=axis) - score
+
+
+_cross_entropy_sparse_compiled = mx.compile(_cross_entropy_sparse)
+_cross_entropy_sparse_smoothed_compiled = mx.compile(_cross_entropy_sparse_smoothed)
+_cross_entropy_dense_compiled = mx.compile(_cross_entropy_dense)
+_cross_entropy_dense_smoothed_compiled = mx.compile(_cross_entropy_dense_smoothed)
+
+
+def _binary_cross_entropy_logits(inputs: mx.array, targets: mx.array) -> mx.array:
+    """Binary cross entropy on pre-sigmoid logits.
+
+    Uses the classical stable form ``max(x, 0) - x * t + log1p(exp(-|x|))``
+    which never exponentiates a positive value and has no cancelling
+    ``1 - p`` subtraction.
+    """
+    return mx.maximum(inputs, 0) - inputs * targets + mx.log1p(mx.exp(-mx.abs(inputs)))
+
+
+_binary_cross_entropy_logits_compiled = mx.compile(_binary_cross_entropy_logits)
+
+
+def _smooth_l1(predictions: mx.array, targets: mx.array, beta: float) -> mx.array:
+    """Branchless smooth L1.
+
+    With ``t = min(|d|, beta)`` the expression ``0.5 * t**2 / beta + |d| - t``
+    equals the quadratic branch for ``|d| < beta`` and the linear branch
+    otherwise, so no ``where`` select is needed.
+    """
+    diff = mx.abs(predictions - targets)
+    quadratic = mx.minimum(diff, beta)
+    return 0.5 * quadratic * quadratic / beta + diff - quadratic
+
+
+_smooth_l1_compiled = mx.compile(_smooth_l1)
+
+
+def _kl_div(inputs: mx.array, targets: mx.array, axis: int) -> mx.array:
+    return mx.sum(mx.exp(targets) * (targets - inputs), axis)
+
+
+_kl_div_compiled = mx.compile(_kl_div)
+
+
+def _l1(predictions: mx.array, targets: mx.array, reduction: str) -> mx.array:
+    return _reduce(mx.abs(predictions - targets), reduction)
+
+
+def _mse(predictions: mx.array, targets: mx.array, reduction: str) -> mx.array:
+    return _reduce(mx.square(predictions - targets), reduction)
+
+
+# The reduction is a compile-time constant, so each reduction mode gets its
+# own fused elementwise + reduce kernel with no intermediate materialized.
+_l1_compiled = mx.compile(_l1)
+_mse_compiled = mx.compile(_mse)
+
+
+# Pre-bound reducers so the hot path is a single dict lookup and the
+# compiled mean/sum graphs are traced once and reused across all losses.
+_REDUCERS = {
+    "none": lambda loss: loss,
+    "mean": mx.compile(mx.mean),
+    "sum": mx.compile(mx.sum),
+}
+
+
 def _reduce(loss: mx.array, reduction: Reduction = "none"):
-    if reduction not in get_args(Reduction):
-        raise ValueError(f"Invalid reduction. Must be one of {get_args(Reduction)}.")
+    try:
+        return _REDUCERS[reduction](loss)
+    except KeyError:
+        raise ValueError(
+            f"Invalid reduction. Must be one of {get_args(Reduction)}."
+        ) from None
+
+
+def _weighted_reduce(loss: mx.array, weights: mx.array, reduction: str) -> mx.array:
+    return _reduce(loss * weights, reduction)
 
-    if reduction == "mean":
-        return mx.mean(loss)
-    elif reduction == "sum":
-        return mx.sum(loss)
-    elif reduction == "none":
-        return loss
+
+# Fuses the weight multiply with the reduction so the weighted loss is
+# accumulated directly instead of materialized and re-read.
+_weighted_reduce_compiled = mx.compile(_weighted_reduce)
 
 
 def cross_entropy(
@@ -27,6 +256,7 @@ def cross_entropy(
     axis: int = -1,
     label_smoothing: float = 0.0,
     reduction: Reduction = "none",
+    compute_dtype: Optional[mx.Dtype] = None,
 ) -> mx.array:
     """
     Computes the cross entropy loss.
@@ -44,6 +274,12 @@ def cross_entropy(
         label_smoothing (float, optional): Label smoothing factor. Default: ``0``.
         reduction (str, optional): Specifies the reduction to apply to the output:
             ``'none'`` | ``'mean'`` | ``'sum'``. Default: ``'none'``.
+        compute_dtype (Dtype, optional): If given, cast the logits to this
+            (typically narrower) float type for the reductions and cast the
+            result back. The computation is max-shifted first so e.g.
+            ``mx.bfloat16`` halves the bytes moved over the logits at a small
+            precision cost. Only used for class-index targets.
+            Default: ``None``.
 
     Returns:
         array: The computed cross entropy loss.
@@ -67,15 +303,13 @@ def cross_entropy(
     if label_smoothing < 0 or label_smoothing >= 1:
         raise ValueError(f"Label smoothing must in [0, 1), got {label_smoothing}.")
 
-    # Whether targets are class indices or probabilities
-    targets_as_probs = targets.ndim == logits.ndim
-
     def _drop_dim(shape, axis):
         shape = list(shape)
         shape.pop(axis)
         return tuple(shape)
 
     # Check shapes in two cases: targets as class indices and targets as probabilities
+    targets_as_probs = targets.ndim == logits.ndim
     if (targets_as_probs and targets.shape != logits.shape) or (
         not targets_as_probs and targets.shape != _drop_dim(logits.shape, axis)
     ):
@@ -83,35 +317,51 @@ def cross_entropy(
             f"Targets shape {targets.shape} does not match logits shape {logits.shape}."
         )
 
-    if targets_as_probs:
-        score = mx.sum(logits * targets, axis=axis)
-    else:
-        score = mx.take_along_axis(logits, targets[..., None], axis).squeeze(-1)
+    # The loss has the logits shape with the class axis removed
+    if weights is not None and weights.shape != _drop_dim(logits.shape, axis):
+        raise ValueError(
+            f"Weights with shape {weights.shape} is not the same as "
+            f"output loss with shape {_drop_dim(logits.shape, axis)}."
+        )
 
-    logsumexp_logits = mx.logsumexp(logits, axis=axis)
-    if label_smoothing > 0:
-        # Adjust the true class score with label smoothing
-        adjusted_score = (1 - label_smoothing) * score
+    return _cross_entropy_unchecked(
+        logits, targets, weights, axis, label_smoothing, reduction, compute_dtype
+    )
 
-        # Calculate the mean logit across the classes for smoothed loss
-        mean_logits = logits.mean(axis=axis)
-        smoothed_loss = -mean_logits * label_smoothing
 
-        # Combine the adjusted score and smoothed loss with the logsumexp logits
-        loss = logsumexp_logits - adjusted_score + smoothed_loss
+def _cross_entropy_unchecked(
+    logits: mx.array,
+    targets: mx.array,
+    weights: Optional[mx.array],
+    axis: int,
+    label_smoothing: float,
+    reduction: Reduction,
+    compute_dtype: Optional[mx.Dtype],
+) -> mx.array:
+    """:func:`cross_entropy` without the Python-level argument validation.
+
+    Per-minibatch loops with known-good arguments can call this directly to
+    go straight to the compiled graphs.
+    """
+    if targets.ndim == logits.ndim:
+        if label_smoothing > 0:
+            loss = _cross_entropy_dense_smoothed_compiled(
+                logits, targets, axis, label_smoothing
+            )
+        else:
+            loss = _cross_entropy_dense_compiled(logits, targets, axis)
+    elif label_smoothing > 0:
+        loss = _cross_entropy_sparse_smoothed_compiled(
+            logits, targets, axis, label_smoothing, _dtype_name(compute_dtype)
+        )
     else:
-        loss = logsumexp_logits - score
+        loss = _cross_entropy_sparse_compiled(
+            logits, targets, axis, _dtype_name(compute_dtype)
+        )
 
-    # Apply weights if provided
     if weights is not None:
-        if weights.shape != loss.shape:
-            raise ValueError(
-                f"Weights with shape {weights.shape} is not the same as "
-                f"output loss with shape {loss.shape}."
-            )
-        loss *= weights
+        return _weighted_reduce_compiled(loss, weights, reduction)
 
-    # Apply reduction
     return _reduce(loss, reduction)
 
 
@@ -163,7 +413,7 @@ def binary_cross_entropy(
         )
 
     if with_logits:
-        loss = mx.logaddexp(0.0, inputs) - inputs * targets
+        loss = _binary_cross_entropy_logits_compiled(inputs, targets)
     else:
         log_inputs_clip = mx.clip(mx.log(inputs), a_min=-100, a_max=None)
         log_inputs_inv_clip = mx.clip(mx.log(1 - inputs), a_min=-100, a_max=None)
@@ -176,7 +426,7 @@ def binary_cross_entropy(
                 f"Weights with shape {weights.shape} is not the same as "
                 f"output loss with shape {loss.shape}."
             )
-        loss *= weights
+        return _weighted_reduce_compiled(loss, weights, reduction)
 
     return _reduce(loss, reduction)
 
@@ -201,9 +451,7 @@ def l1_loss(
             f"Predictions shape {predictions.shape} does not match "
             f"targets shape {targets.shape}."
         )
-    loss = mx.abs(predictions - targets)
-
-    return _reduce(loss, reduction)
+    return _l1_compiled(predictions, targets, reduction)
 
 
 def mse_loss(
@@ -227,8 +475,7 @@ def mse_loss(
             f"targets shape {targets.shape}."
         )
 
-    loss = mx.square(predictions - targets)
-    return _reduce(loss, reduction)
+    return _mse_compiled(predictions, targets, reduction)
 
 
 def nll_loss(
@@ -237,6 +484,11 @@ def nll_loss(
     """
     Computes the negative log likelihood loss.
 
+    .. note::
+       If the log probabilities come from :func:`mx.log_softmax` over
+       logits, prefer :func:`nll_loss_from_logits` which never
+       materializes the full log-softmax tensor.
+
     Args:
         inputs (array): The predicted distribution in log space.
         targets (array): The target values.
@@ -247,7 +499,32 @@ def nll_loss(
     Returns:
         array: The computed NLL loss.
     """
-    loss = -mx.take_along_axis(inputs, targets[..., None], axis).squeeze(-1)
+    loss = -_gather_target_scores_compiled(inputs, targets, axis)
+
+    return _reduce(loss, reduction)
+
+
+def nll_loss_from_logits(
+    logits: mx.array, targets: mx.array, axis: int = -1, reduction: Reduction = "none"
+) -> mx.array:
+    """
+    Computes the negative log likelihood loss directly from logits.
+
+    Equivalent to ``nll_loss(log_softmax(logits, axis), targets, axis)`` but
+    gathers only the target class scores with the max-shifted formulation,
+    so the full log-softmax tensor is never written out or re-read.
+
+    Args:
+        logits (array): The unnormalized logits.
+        targets (array): The target class indices.
+        axis (int, optional): The distribution axis. Default: ``-1``.
+        reduction (str, optional): Specifies the reduction to apply to the output:
+          ``'none'`` | ``'mean'`` | ``'sum'``. Default: ``'none'``.
+
+    Returns:
+        array: The computed NLL loss.
+    """
+    loss = _cross_entropy_sparse_compiled(logits, targets, axis, None)
 
     return _reduce(loss, reduction)
 
@@ -329,7 +606,7 @@ def kl_div_loss(
     Returns:
         array: The computed Kullback-Leibler divergence loss.
     """
-    loss = mx.sum(mx.exp(targets) * (targets - inputs), axis)
+    loss = _kl_div_compiled(inputs, targets, axis)
 
     return _reduce(loss, reduction)
 
@@ -373,10 +650,12 @@ def smooth_l1_loss(
             f"targets shape {targets.shape}."
         )
 
-    diff = mx.abs(predictions - targets)
-    loss = mx.where(
-        diff < beta, 0.5 * mx.square(diff) / beta, mx.abs(diff) - 0.5 * beta
-    )
+    if beta == 0:
+        # The branchless helper divides by beta; with beta == 0 the loss
+        # reduces to the absolute difference.
+        return _l1_compiled(predictions, targets, reduction)
+
+    loss = _smooth_l1_compiled(predictions, targets, beta)
 
     return _reduce(loss, reduction)
 
@@ -66,6 +66,85 @@ class TestLosses(mlx_tests.MLXTestCase):
         )
         self.assertTrue(mx.allclose(loss, expected))
 
+    def test_cross_entropy_grad(self):
+        # The sparse-target path has a hand-coded vjp; check it against
+        # autograd of the decomposed formula.
+        def reference(logits, targets, axis=-1, label_smoothing=0.0):
+            score = mx.take_along_axis(logits, targets[..., None], axis).squeeze(-1)
+            logsumexp_logits = mx.logsumexp(logits, axis=axis)
+            if label_smoothing > 0:
+                return (
+                    logsumexp_logits
+                    - (1 - label_smoothing) * score
+                    - label_smoothing * logits.mean(axis=axis)
+                )
+            return logsumexp_logits - score
+
+        mx.random.seed(7)
+
+        # No label smoothing
+        logits = mx.random.normal((4, 7))
+        targets = mx.random.randint(0, 7, (4,))
+        grad = mx.grad(lambda x: nn.losses.cross_entropy(x, targets).sum())(logits)
+        expected = mx.grad(lambda x: reference(x, targets).sum())(logits)
+        self.assertTrue(mx.allclose(grad, expected, atol=1e-6))
+
+        # With label smoothing and a mean reduction
+        grad = mx.grad(
+            lambda x: nn.losses.cross_entropy(
+                x, targets, label_smoothing=0.2, reduction="mean"
+            )
+        )(logits)
+        expected = mx.grad(
+            lambda x: mx.mean(reference(x, targets, label_smoothing=0.2))
+        )(logits)
+        self.assertTrue(mx.allclose(grad, expected, atol=1e-6))
+
+        # 3-D logits
+        logits = mx.random.normal((2, 3, 5))
+        targets = mx.random.randint(0, 5, (2, 3))
+        grad = mx.grad(
+            lambda x: nn.losses.cross_entropy(x, targets, label_smoothing=0.1).sum()
+        )(logits)
+        expected = mx.grad(lambda x: reference(x, targets, label_smoothing=0.1).sum())(
+            logits
+        )
+        self.assertTrue(mx.allclose(grad, expected, atol=1e-6))
+
+    def test_cross_entropy_compute_dtype(self):
+        mx.random.seed(11)
+        logits = mx.random.normal((8, 32)) * 4
+        targets = mx.random.randint(0, 32, (8,))
+        expected = nn.losses.cross_entropy(logits, targets)
+
+        for compute_dtype in (mx.bfloat16, mx.float16):
+            # The loss comes back in the input precision
+            loss = nn.losses.cross_entropy(logits, targets, compute_dtype=compute_dtype)
+            self.assertEqual(loss.dtype, logits.dtype)
+            self.assertTrue(mx.allclose(loss, expected, atol=1e-1, rtol=1e-1))
+
+        # Composes with label smoothing
+        loss = nn.losses.cross_entropy(
+            logits, targets, label_smoothing=0.2, compute_dtype=mx.bfloat16
+        )
+        expected_smoothed = nn.losses.cross_entropy(
+            logits, targets, label_smoothing=0.2
+        )
+        self.assertEqual(loss.dtype, logits.dtype)
+        self.assertTrue(mx.allclose(loss, expected_smoothed, atol=1e-1, rtol=1e-1))
+
+        # And with mx.grad
+        grad = mx.grad(
+            lambda x: nn.losses.cross_entropy(
+                x, targets, compute_dtype=mx.bfloat16
+            ).sum()
+        )(logits)
+        expected_grad = mx.grad(lambda x: nn.losses.cross_entropy(x, targets).sum())(
+            logits
+        )
+        self.assertEqual(grad.dtype, logits.dtype)
+        self.assertTrue(mx.allclose(grad, expected_grad, atol=1e-1, rtol=1e-1))
+
     def test_binary_cross_entropy(self):
         def _test_logits_as_inputs():
             logits = mx.array([0.105361, 0.223144, 1.20397, 0.916291])
@@ -241,6 +320,13 @@ class TestLosses(mlx_tests.MLXTestCase):
             "Test case failed for smooth_l1_loss --reduction='mean'",
         )
 
+        # With beta 0 the loss is the absolute difference
+        loss_beta_zero = nn.losses.smooth_l1_loss(
+            predictions, targets, beta=0.0, reduction="none"
+        )
+        expected_beta_zero = mx.abs(predictions - targets)
+        self.assertTrue(mx.array_equal(loss_beta_zero, expected_beta_zero))
+
     def test_nll_loss(self):
         logits = mx.array([[0.0, -float("inf")], [-float("inf"), 0.0]])
         targets = mx.array([0, 1])
@@ -260,6 +346,26 @@ class TestLosses(mlx_tests.MLXTestCase):
         expected_sum = mx.sum(expected_none)
         self.assertEqual(losses_sum, expected_sum)
 
+    def test_nll_loss_from_logits(self):
+        logits = mx.array([[2.0, -1.0], [-1.0, 2.0]])
+        targets = mx.array([0, 1])
+
+        expected = nn.losses.nll_loss(
+            mx.log(mx.softmax(logits, axis=-1)), targets, reduction="none"
+        )
+
+        # Test with reduction 'none'
+        losses_none = nn.losses.nll_loss_from_logits(logits, targets, reduction="none")
+        self.assertTrue(mx.allclose(losses_none, expected))
+
+        # Test with reduction 'mean'
+        losses_mean = nn.losses.nll_loss_from_logits(logits, targets, reduction="mean")
+        self.assertTrue(mx.allclose(losses_mean, mx.mean(expected)))
+
+        # Test with reduction 'sum'
+        losses_sum = nn.losses.nll_loss_from_logits(logits, targets, reduction="sum")
+        self.assertTrue(mx.allclose(losses_sum, mx.sum(expected)))
+
     def test_gaussian_nll_loss(self):
         inputs = mx.array([[0.1, 0.2], [0.3, 0.4]])
         targets = mx.array([[0.2, 0.1], [0.1, 0.2]])